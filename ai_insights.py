@@ -2,12 +2,93 @@ from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Tuple
 import calendar
 
+# Anomaly detection: minimum history size and z-score thresholds
+MIN_EXPENSE_HISTORY = 5
+MIN_MONTH_HISTORY = 3
+EXPENSE_Z_THRESHOLD = 3.0
+MONTH_Z_THRESHOLD = 2.0
+MAX_UNUSUAL_EXPENSES = 3
+
+
+def _z_score(value: float, stats) -> Optional[float]:
+    """Standard score of value against stats that exclude it"""
+    stdev = stats.stdev
+    if stdev <= 0:
+        return None
+    return (value - stats.mean) / stdev
+
+
+def get_anomaly_insights(expenses,
+                         category_spending: Dict[str, float],
+                         month_name: str,
+                         category_stats: Optional[Dict] = None,
+                         monthly_category_stats: Optional[Dict] = None,
+                         month_complete: bool = True,
+                         in_progress_totals: Optional[Dict[str, float]] = None) -> List[str]:
+    """
+    Flag expenses and category totals that are unusual for this user.
+
+    The stats are running (Welford) statistics kept up to date by the
+    store, so each check is O(1): the value under test is retracted from
+    its own history instead of re-reading past months. A month still in
+    progress is only flagged for running high, since its partial totals
+    are naturally below those of complete months. For the same reason,
+    ``in_progress_totals`` (the current month's category totals, when
+    another month is being scored) are kept out of the history.
+    """
+    insights = []
+
+    if category_stats:
+        unusual = []
+        for expense in expenses:
+            stats = category_stats.get(expense.category)
+            if stats is None:
+                continue
+            history = stats.pop(expense.amount)
+            if history.count < MIN_EXPENSE_HISTORY:
+                continue
+            z = _z_score(expense.amount, history)
+            if z is not None and z > EXPENSE_Z_THRESHOLD:
+                unusual.append((z, expense, history.mean))
+        unusual.sort(key=lambda item: item[0], reverse=True)
+        for _, expense, typical in unusual[:MAX_UNUSUAL_EXPENSES]:
+            insights.append(
+                f"🚨 Unusual {expense.category} expense on {expense.date.strftime('%b %d')}: "
+                f"${expense.amount:.2f} for {expense.description} "
+                f"(you typically spend ${typical:.2f}).")
+
+    if monthly_category_stats:
+        for category, amount in category_spending.items():
+            series = monthly_category_stats.get(category)
+            if series is None:
+                continue
+            history = series.pop(amount)
+            partial = (in_progress_totals or {}).get(category)
+            if partial is not None:
+                history = history.pop(partial)
+            if history.count < MIN_MONTH_HISTORY:
+                continue
+            z = _z_score(amount, history)
+            if z is None or abs(z) <= MONTH_Z_THRESHOLD:
+                continue
+            if z > 0 or month_complete:
+                direction = "higher" if z > 0 else "lower"
+                insights.append(
+                    f"📊 Your {category} spending in {month_name} (${amount:.2f}) is much {direction} "
+                    f"than your usual ${history.mean:.2f} per month.")
+
+    return insights
+
+
 def get_ai_insights(expenses,
                    generate: bool = False,
                    selected_month: Optional[int] = None,
                    selected_year: Optional[int] = None,
                    monthly_salary: float = 0,
-                   current_savings: float = 0) -> str:
+                   current_savings: float = 0,
+                   category_stats: Optional[Dict] = None,
+                   monthly_category_stats: Optional[Dict] = None,
+                   current_month_totals: Optional[Dict[str, float]] = None) -> str:
     """
     Generate AI insights based on user expenses.
 
@@ -18,6 +99,9 @@ def get_ai_insights(expenses,
         selected_year: The year for which insights are being generated
         monthly_salary: User's monthly salary
         current_savings: User's current savings
+        category_stats: Running stats of expense amounts per category
+        monthly_category_stats: Running stats of monthly totals per category
+        current_month_totals: Category totals of the current, unfinished month
 
     Returns:
         A string containing AI-generated insights
@@ -84,6 +168,16 @@ def get_ai_insights(expenses,
                     f"⚖️ You spent {percentage:.1f}% of your budget on {category}. "
                     "Consider diversifying your expenses.")
 
+    # Anomalies against the user's own history
+    today = datetime.now()
+    month_complete = bool(selected_month and selected_year) and (
+        (selected_year, selected_month) < (today.year, today.month))
+    is_current_month = (selected_year, selected_month) == (today.year, today.month)
+    insights.extend(get_anomaly_insights(expenses, category_spending, month_name,
+                                         category_stats, monthly_category_stats,
+                                         month_complete,
+                                         None if is_current_month else current_month_totals))
+
     # Frequency analysis
     daily_expenses = {}
     for expense in expenses:
@@ -1,38 +1,81 @@
 import os
+import hashlib
 import logging
+from datetime import datetime
 from flask import Flask
 from flask_login import LoginManager
+from jinja2 import FileSystemBytecodeCache
 import markupsafe
+from fragment_cache import FragmentCache
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 
-# Initialize Flask app
-app = Flask(__name__)
+# Initialize Flask app. The folders are capitalised, so name them for
+# case-sensitive filesystems
+app = Flask(__name__, template_folder="Templates", static_folder="Static",
+            static_url_path="/static")
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key")
 
+# Static URLs carry a content hash (see static_fingerprint), so browsers can
+# keep the files for a year and still pick up changes immediately
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 365 * 24 * 60 * 60
+
+# Persist compiled templates so new processes skip Jinja compilation. Without
+# JINJA_CACHE_DIR, Jinja picks a per-user temp directory and refuses one that
+# another user owns, so nobody else can plant bytecode for it to execute
+JINJA_CACHE_DIR = os.environ.get("JINJA_CACHE_DIR")
+if JINJA_CACHE_DIR:
+    os.makedirs(JINJA_CACHE_DIR, mode=0o700, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(JINJA_CACHE_DIR)
+else:
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+
+# Rendered dashboard fragments, keyed by user/month version
+fragment_cache = FragmentCache()
+
 # Initialize Flask-Login
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
 # Import routes after app initialization to avoid circular imports
-from models import User
+from models import user_cache
 
+# Flask-Login already memoizes the loaded user for the rest of the request,
+# so this only runs once per request and the cache covers across requests
 @login_manager.user_loader
 def load_user(user_id):
-    logging.debug(f"Loading user with ID: {user_id}")
-    return User.get(user_id)
+    return user_cache.get(user_id)
 
 # Add Jinja2 filters and utilities after all imports
 @app.template_filter('nl2br')
 def nl2br(value):
     return markupsafe.Markup(markupsafe.escape(value).replace('\n', '<br>'))
 
-@app.context_processor
-def utility_processor():
-    from datetime import datetime
-    return dict(datetime=datetime)
+# Registered once rather than through a per-request context processor
+app.jinja_env.globals['datetime'] = datetime
+
+# filename -> (mtime, short content hash)
+_static_hashes = {}
+
+
+@app.url_defaults
+def static_fingerprint(endpoint, values):
+    """Append a content hash to static URLs for long-lived caching"""
+    if endpoint != 'static' or 'filename' not in values:
+        return
+    path = os.path.join(app.static_folder, values['filename'])
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return
+    cached = _static_hashes.get(values['filename'])
+    if cached is None or cached[0] != mtime:
+        with open(path, 'rb') as f:
+            cached = (mtime, hashlib.md5(f.read()).hexdigest()[:12])
+        _static_hashes[values['filename']] = cached
+    values['v'] = cached[1]
 
 # Import routes last to avoid circular imports
 import routes
\ No newline at end of file
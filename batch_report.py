@@ -0,0 +1,215 @@
+"""
+Batch reporting utility - cross-user spending reports for operators
+Run this script to aggregate spend by category, active users and monthly
+growth across every user, writing JSON or CSV.
+
+Users are split into shards that a process pool aggregates in parallel.
+Each worker memory-maps the same expense snapshot and only reads its own
+users' rows, so nothing is pickled between processes except the small
+partial aggregates that get merged at the end.
+
+The report reads a persisted snapshot (expenses_data.snap by default);
+produce or refresh it with migrate_to_snapshot.py. --from-pickle builds a
+temporary snapshot instead, which unpickles the whole store and writes the
+snapshot in a single thread first, so that serial step rather than the
+pool bounds how well it scales with cores.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from snapshot import SNAPSHOT_FILE, SnapshotReader, write_snapshot
+
+# Partial aggregate shape, as produced by a shard and merged by the parent:
+#   categories: {category: [count, total]}
+#   months:     {"YYYY-MM": [count, total, active_users]}
+#   active_users: int
+Partial = Dict[str, object]
+
+_reader: Optional[SnapshotReader] = None
+
+
+def _open_worker(snapshot_file: str) -> None:
+    global _reader
+    _reader = SnapshotReader(snapshot_file)
+
+
+def aggregate_shard(user_ids: List[str]) -> Partial:
+    """Aggregate one shard of users from the worker's snapshot"""
+    categories: Dict[str, List[float]] = {}
+    months: Dict[str, List[float]] = {}
+    active_users = 0
+    for user_id in user_ids:
+        seen_months = set()
+        for date, amount, category in _reader.scan(user_id):
+            entry = categories.setdefault(category, [0, 0.0])
+            entry[0] += 1
+            entry[1] += amount
+            month = f"{date.year:04d}-{date.month:02d}"
+            entry = months.setdefault(month, [0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += amount
+            if month not in seen_months:
+                seen_months.add(month)
+                entry[2] += 1
+        if seen_months:
+            active_users += 1
+    return {'categories': categories, 'months': months, 'active_users': active_users}
+
+
+def merge_partials(partials) -> Partial:
+    """Sum shard aggregates; every field is additive across disjoint users"""
+    categories: Dict[str, List[float]] = {}
+    months: Dict[str, List[float]] = {}
+    active_users = 0
+    for partial in partials:
+        for key, values in partial['categories'].items():
+            merged = categories.setdefault(key, [0, 0.0])
+            for i, value in enumerate(values):
+                merged[i] += value
+        for key, values in partial['months'].items():
+            merged = months.setdefault(key, [0, 0.0, 0])
+            for i, value in enumerate(values):
+                merged[i] += value
+        active_users += partial['active_users']
+    return {'categories': categories, 'months': months, 'active_users': active_users}
+
+
+def _growth(current: float, previous: Optional[float]) -> Optional[float]:
+    if not previous:
+        return None
+    return round((current - previous) / previous * 100, 2)
+
+
+def _calendar_months(first: str, last: str) -> List[str]:
+    """Every "YYYY-MM" from first to last inclusive"""
+    year, month = map(int, first.split('-'))
+    months = []
+    while f"{year:04d}-{month:02d}" <= last:
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def build_report(merged: Partial,
+                 registered_users: Optional[int] = None) -> Dict[str, object]:
+    """Turn merged aggregates into report rows, adding month-over-month growth
+
+    Months without expenses are reported as zeros, so growth is always
+    against the previous calendar month.
+    """
+    categories = [
+        {'category': name, 'expenses': count, 'total': round(total, 2)}
+        for name, (count, total) in sorted(merged['categories'].items(),
+                                           key=lambda item: item[1][1], reverse=True)
+    ]
+    monthly = []
+    previous: Optional[Tuple[float, int]] = None
+    present = sorted(merged['months'])
+    for month in _calendar_months(present[0], present[-1]) if present else []:
+        count, total, active = merged['months'].get(month, (0, 0.0, 0))
+        monthly.append({
+            'month': month,
+            'expenses': count,
+            'total': round(total, 2),
+            'active_users': active,
+            'spend_growth_pct': _growth(total, previous[0] if previous else None),
+            'active_user_growth_pct': _growth(active, previous[1] if previous else None),
+        })
+        previous = (total, active)
+    summary = {'active_users': merged['active_users']}
+    if registered_users is not None:
+        summary['registered_users'] = registered_users
+    return {
+        'summary': summary,
+        'categories': categories,
+        'monthly': monthly,
+    }
+
+
+def run_report(snapshot_file: str, workers: Optional[int] = None,
+               shards_per_worker: int = 4,
+               registered_users: Optional[int] = None) -> Dict[str, object]:
+    """Aggregate a snapshot in a process pool
+
+    The snapshot only knows users' expenses; pass registered_users to
+    include the total from the user store.
+    """
+    with SnapshotReader(snapshot_file) as reader:
+        user_ids = reader.user_ids()
+    workers = workers or os.cpu_count() or 1
+    # A few shards per worker evens out users with very different histories
+    shard_count = max(1, min(len(user_ids), workers * shards_per_worker))
+    shards = [user_ids[i::shard_count] for i in range(shard_count)]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_open_worker,
+                             initargs=(snapshot_file,)) as pool:
+        merged = merge_partials(pool.map(aggregate_shard, shards))
+    return build_report(merged, registered_users)
+
+
+def write_json(report: Dict[str, object], output: Optional[str]) -> None:
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+def write_csv(report: Dict[str, object], output: str) -> None:
+    """Write summary.csv, categories.csv and monthly.csv into ``output``"""
+    os.makedirs(output, exist_ok=True)
+    tables = {
+        'summary.csv': [report['summary']],
+        'categories.csv': report['categories'],
+        'monthly.csv': report['monthly'],
+    }
+    for filename, rows in tables.items():
+        if not rows:
+            continue
+        with open(os.path.join(output, filename), 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--snapshot', default=SNAPSHOT_FILE,
+                        help=f"Expense snapshot to read (default: {SNAPSHOT_FILE})")
+    parser.add_argument('--from-pickle', action='store_true',
+                        help="Snapshot the pickled store first (slower, single-threaded step)")
+    parser.add_argument('--format', choices=('json', 'csv'), default='json')
+    parser.add_argument('-o', '--output',
+                        help="JSON file, or directory for CSV (default: stdout / report)")
+    parser.add_argument('-j', '--workers', type=int, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    if not args.from_pickle:
+        if not os.path.exists(args.snapshot):
+            parser.error(f"{args.snapshot} not found; run migrate_to_snapshot.py "
+                         "or pass --from-pickle")
+        report = run_report(args.snapshot, args.workers)
+    else:
+        # Imported here so reading an existing snapshot needs no app dependencies
+        import models
+        with tempfile.TemporaryDirectory() as tmp:
+            snapshot_file = os.path.join(tmp, 'expenses.snap')
+            write_snapshot(snapshot_file, models.expenses, models.next_expense_id)
+            report = run_report(snapshot_file, args.workers,
+                                registered_users=len(models.users))
+
+    if args.format == 'csv':
+        write_csv(report, args.output or 'report')
+    else:
+        write_json(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,11 +8,15 @@ import os
 USERS_FILE = "users_data.pkl"
 EXPENSES_FILE = "expenses_data.pkl"
 COUNTER_FILE = "counters_data.pkl"
+EXPENSE_JOURNAL_FILE = "expenses_journal.pkl"
+# File path from snapshot.py
+SNAPSHOT_FILE = "expenses_data.snap"
 
 
 def cleanup_database():
     """Remove all database files"""
-    files_to_remove = [USERS_FILE, EXPENSES_FILE, COUNTER_FILE]
+    files_to_remove = [USERS_FILE, EXPENSES_FILE, COUNTER_FILE, EXPENSE_JOURNAL_FILE,
+                       SNAPSHOT_FILE]
 
     for file in files_to_remove:
         try:
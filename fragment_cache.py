@@ -0,0 +1,51 @@
+"""
+Rendered template fragment cache
+
+Parts of a page that only change when their inputs change are rendered
+once per cache key and reused as Markup. Callers put everything the
+fragment depends on into the key, e.g. (user id, year, month, month version).
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable
+
+import markupsafe
+from flask import render_template
+
+
+class FragmentCache:
+    """Bounded LRU of rendered fragments"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, markupsafe.Markup]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, key: Hashable, template_name: str, **context) -> markupsafe.Markup:
+        """Return the cached fragment for key, rendering the template on a miss"""
+        with self._lock:
+            fragment = self._entries.get(key)
+            if fragment is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return fragment
+            self.misses += 1
+
+        # Render outside the lock; two threads may race to fill the same key,
+        # which only costs a duplicate render
+        fragment = markupsafe.Markup(render_template(template_name, **context))
+        with self._lock:
+            self._entries[key] = fragment
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return fragment
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
@@ -0,0 +1,29 @@
+"""
+Snapshot migration utility - converts the pickled expenses store
+Run this script to write expenses_data.pkl and counters_data.pkl into the
+binary snapshot format read by snapshot.SnapshotReader. The app keeps using
+the pickle files, so re-run it whenever an up-to-date export is needed.
+
+Only run it against pickle files you created yourself: unpickling runs
+arbitrary code from the file.
+"""
+import sys
+
+import models
+from snapshot import SNAPSHOT_FILE, SnapshotReader, write_snapshot
+
+
+def migrate(snapshot_file: str = SNAPSHOT_FILE) -> None:
+    """Write the loaded expenses to a snapshot and verify it reads back"""
+    count = write_snapshot(snapshot_file, models.expenses, models.next_expense_id)
+    print(f"Wrote {count} expenses for {len(models.expenses)} users to {snapshot_file}")
+
+    with SnapshotReader(snapshot_file) as reader:
+        for user_id, user_expenses in models.expenses.items():
+            if len(reader.get_user_expenses(user_id)) != len(user_expenses):
+                raise SystemExit(f"Verification failed for user {user_id}")
+    print("Snapshot verified")
+
+
+if __name__ == "__main__":
+    migrate(sys.argv[1] if len(sys.argv) > 1 else SNAPSHOT_FILE)
@@ -3,14 +3,23 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 import os
 import pickle
-from typing import List, Dict, Optional, Union
+from typing import List, Dict, NamedTuple, Optional, Tuple, Union
 import logging
 import calendar
+import copy
+import itertools
+import math
+import threading
+import time
 
 # File paths for persistence
 USERS_FILE = "users_data.pkl"
 EXPENSES_FILE = "expenses_data.pkl"
 COUNTER_FILE = "counters_data.pkl"
+# Append-only log of edited expenses, folded into EXPENSES_FILE on the next
+# full rewrite so an edit doesn't have to rewrite every expense
+EXPENSE_JOURNAL_FILE = "expenses_journal.pkl"
+JOURNAL_COMPACT_AFTER = 500
 
 # In-memory storage
 users: Dict[str, 'User'] = {}
@@ -18,9 +27,304 @@ expenses: Dict[str, List['Expense']] = {}
 next_user_id = 1
 next_expense_id = 1
 
+# Serializes writers and the pickle dumps that snapshot the global dicts.
+# Readers never take it: writers publish new lists and dicts instead of
+# mutating ones a reader may be iterating (copy-on-write).
+_store_lock = threading.RLock()
+
+# Bumped whenever a user's month changes; values come from one process-wide
+# counter so they never repeat, even after rebuild_index()
+_version_counter = itertools.count(1)
+
+MonthKey = Tuple[int, int]
+
+
+class RunningStats(NamedTuple):
+    """Welford mean/variance that can also retract a value in O(1)"""
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def push(self, value: float) -> 'RunningStats':
+        count = self.count + 1
+        delta = value - self.mean
+        mean = self.mean + delta / count
+        return RunningStats(count, mean, self.m2 + delta * (value - mean))
+
+    def pop(self, value: float) -> 'RunningStats':
+        if self.count <= 1:
+            return RunningStats()
+        count = self.count - 1
+        mean = (self.mean * self.count - value) / count
+        m2 = self.m2 - (value - mean) * (value - self.mean)
+        return RunningStats(count, mean, max(m2, 0.0))
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class UserIndex(NamedTuple):
+    """Everything derived from one user's expenses, published as one unit
+
+    Writers build a new UserIndex and swap it in with a single assignment,
+    so a reader that takes one reference sees buckets, totals and stats
+    from the same moment. ``category_stats`` covers single expense amounts
+    and ``category_month_stats`` each month's category total; the
+    (count, total) pairs in ``category_month_totals`` let a monthly total
+    be retracted when it changes.
+    """
+    months: Dict[MonthKey, List['Expense']] = {}
+    totals: Dict[MonthKey, float] = {}
+    category_stats: Dict[str, RunningStats] = {}
+    category_month_totals: Dict[MonthKey, Dict[str, Tuple[int, float]]] = {}
+    category_month_stats: Dict[str, RunningStats] = {}
+    versions: Dict[MonthKey, int] = {}
+
+    def month_expenses(self, year: int, month: int) -> List['Expense']:
+        return list(self.months.get((year, month), []))
+
+    def month_total(self, year: int, month: int) -> float:
+        return self.totals.get((year, month), 0.0)
+
+    def month_category_totals(self, year: int, month: int) -> Dict[str, float]:
+        month_totals = self.category_month_totals.get((year, month), {})
+        return {category: total for category, (_, total) in month_totals.items()}
+
+    def month_version(self, year: int, month: int) -> int:
+        return self.versions.get((year, month), 0)
+
+
+# Per-user derived state, keyed by user id
+user_indexes: Dict[str, UserIndex] = {}
+_EMPTY_INDEX = UserIndex()
+
+
+def _month_key(date: datetime) -> MonthKey:
+    return (date.year, date.month)
+
+
+def _apply_category_stats(expense_stats: Dict[str, RunningStats],
+                          month_totals: Dict[MonthKey, Dict[str, Tuple[int, float]]],
+                          month_stats: Dict[str, RunningStats],
+                          key: MonthKey, category: str, amount: float,
+                          adding: bool) -> None:
+    """Add or retract one expense from a user's category statistics
+
+    Mutates the dicts passed in, which must be the writer's own copies.
+    """
+    stats = expense_stats.get(category, RunningStats())
+    stats = stats.push(amount) if adding else stats.pop(amount)
+    if stats.count:
+        expense_stats[category] = stats
+    else:
+        expense_stats.pop(category, None)
+
+    month = dict(month_totals.get(key, {}))
+    count, total = month.pop(category, (0, 0.0))
+    series = month_stats.get(category, RunningStats())
+    if count:
+        series = series.pop(total)
+    count, total = (count + 1, total + amount) if adding else (count - 1, total - amount)
+    if count:
+        month[category] = (count, total)
+        series = series.push(total)
+    if month:
+        month_totals[key] = month
+    else:
+        month_totals.pop(key, None)
+    if series.count:
+        month_stats[category] = series
+    else:
+        month_stats.pop(category, None)
+
+
+def _index_user(user_id: str,
+                added: Optional['Expense'] = None,
+                removed: Optional[Tuple[MonthKey, str, float, str]] = None) -> None:
+    """Publish a new UserIndex reflecting one added and/or removed expense
+
+    ``removed`` is the (month key, expense id, amount, category) the
+    expense was indexed under before the change. Callers must hold
+    ``_store_lock``.
+    """
+    current = user_indexes.get(user_id, _EMPTY_INDEX)
+    index = dict(current.months)
+    totals = dict(current.totals)
+    expense_stats = dict(current.category_stats)
+    month_totals = dict(current.category_month_totals)
+    month_stats = dict(current.category_month_stats)
+    versions = dict(current.versions)
+    if removed is not None:
+        key, expense_id, amount, category = removed
+        old_bucket = index.get(key, [])
+        bucket = [e for e in old_bucket if e.id != expense_id]
+        # Only retract what was actually indexed, so a repeated removal is a no-op
+        if len(bucket) != len(old_bucket):
+            if bucket:
+                index[key] = bucket
+                totals[key] = totals.get(key, 0.0) - amount
+            else:
+                # Drop empty buckets so float drift can't leave a stale total behind
+                index.pop(key, None)
+                totals.pop(key, None)
+            _apply_category_stats(expense_stats, month_totals, month_stats,
+                                  key, category, amount, adding=False)
+            versions[key] = next(_version_counter)
+    if added is not None:
+        key = _month_key(added.date)
+        index[key] = index.get(key, []) + [added]
+        totals[key] = totals.get(key, 0.0) + added.amount
+        _apply_category_stats(expense_stats, month_totals, month_stats,
+                              key, added.category, added.amount, adding=True)
+        versions[key] = next(_version_counter)
+    user_indexes[user_id] = UserIndex(index, totals, expense_stats, month_totals,
+                                      month_stats, versions)
+
+
+def rebuild_index() -> None:
+    """Rebuild every UserIndex from the expenses lists"""
+    with _store_lock:
+        for user_id in list(user_indexes):
+            if user_id not in expenses:
+                del user_indexes[user_id]
+        for user_id, user_expenses in expenses.items():
+            index: Dict[MonthKey, List['Expense']] = {}
+            totals: Dict[MonthKey, float] = {}
+            expense_stats: Dict[str, RunningStats] = {}
+            month_totals: Dict[MonthKey, Dict[str, Tuple[int, float]]] = {}
+            month_stats: Dict[str, RunningStats] = {}
+            for expense in user_expenses:
+                key = _month_key(expense.date)
+                index.setdefault(key, []).append(expense)
+                totals[key] = totals.get(key, 0.0) + expense.amount
+                _apply_category_stats(expense_stats, month_totals, month_stats,
+                                      key, expense.category, expense.amount, adding=True)
+            versions = {key: next(_version_counter) for key in index}
+            user_indexes[user_id] = UserIndex(index, totals, expense_stats, month_totals,
+                                              month_stats, versions)
+
+
+class UserCache:
+    """Short-TTL process-level cache in front of User.get
+
+    Used by the login manager's user loader; User.save() invalidates the
+    entry so a process never serves its own stale writes. The TTL bounds
+    staleness from writes made by other processes.
+    """
+
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Tuple['User', float]] = {}
+        # Bumped by every invalidation; a load that overlaps one is not cached
+        self._generation = 0
+        self._next_purge = time.monotonic() + ttl
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional['User']:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                if entry[1] > now:
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[user_id]
+            self.misses += 1
+            generation = self._generation
+
+        user = User.get(user_id)
+        # Unknown ids are not cached, so a new registration is seen at once
+        if user is not None:
+            with self._lock:
+                if self._generation == generation:
+                    self._entries[user_id] = (user, now + self.ttl)
+                if now >= self._next_purge:
+                    self._purge_expired(now)
+        return user
+
+    def _purge_expired(self, now: float) -> None:
+        """Drop entries for users that stopped making requests (caller holds the lock)"""
+        self._entries = {user_id: entry for user_id, entry in self._entries.items()
+                         if entry[1] > now}
+        self._next_purge = now + self.ttl
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Drop one user, or every user when no id is given"""
+        with self._lock:
+            self._generation += 1
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+
+user_cache = UserCache()
+
+
+def _save_expenses() -> None:
+    """Rewrite every expense; this also compacts the edit journal"""
+    global _journal_entries
+    with open(EXPENSES_FILE, 'wb') as f:
+        pickle.dump(expenses, f)
+    if os.path.exists(EXPENSE_JOURNAL_FILE):
+        os.remove(EXPENSE_JOURNAL_FILE)
+    _journal_entries = 0
+
+
+_journal_entries = 0
+
+
+def _journal_expense(expense: 'Expense') -> None:
+    """Append one edited expense to the journal instead of rewriting them all"""
+    global _journal_entries
+    with open(EXPENSE_JOURNAL_FILE, 'ab') as f:
+        pickle.dump({
+            'id': expense.id,
+            'user_id': expense.user_id,
+            'amount': expense.amount,
+            'category': expense.category,
+            'description': expense.description,
+            'date': expense.date,
+        }, f)
+    _journal_entries += 1
+    if _journal_entries >= JOURNAL_COMPACT_AFTER:
+        _save_expenses()
+
+
+def _replay_journal() -> int:
+    """Apply journaled edits to the loaded expenses; returns the entry count"""
+    if not os.path.exists(EXPENSE_JOURNAL_FILE):
+        return 0
+    by_id = {e.id: e for user_expenses in expenses.values() for e in user_expenses}
+    count = 0
+    with open(EXPENSE_JOURNAL_FILE, 'rb') as f:
+        while True:
+            try:
+                entry = pickle.load(f)
+            except EOFError:
+                break
+            except pickle.UnpicklingError:
+                # A crash mid-append leaves a partial last entry
+                logging.warning("Ignoring truncated entry at end of expense journal")
+                break
+            expense = by_id.get(entry['id'])
+            if expense is not None and expense.user_id == entry['user_id']:
+                expense.amount = entry['amount']
+                expense.category = entry['category']
+                expense.description = entry['description']
+                expense.date = entry['date']
+            count += 1
+    return count
+
 
 def load_data() -> None:
-    global users, expenses, next_user_id, next_expense_id
+    global users, expenses, next_user_id, next_expense_id, _journal_entries
 
     try:
         if os.path.exists(USERS_FILE):
@@ -37,6 +341,14 @@ def load_data() -> None:
                 next_user_id = counters.get('next_user_id', 1)
                 next_expense_id = counters.get('next_expense_id', 1)
 
+        # Older edits re-appended the same expense; keep one row per id
+        for user_id, user_expenses in expenses.items():
+            expenses[user_id] = list({e.id: e for e in user_expenses}.values())
+
+        _journal_entries = _replay_journal()
+
+        rebuild_index()
+        user_cache.invalidate()
         logging.info(
             f"Loaded {len(users)} users and expenses for {len(expenses)} users")
     except Exception as e:
@@ -47,8 +359,9 @@ class User(UserMixin):
 
     def __init__(self, username: str, email: str):
         global next_user_id
-        self.id = str(next_user_id)
-        next_user_id += 1
+        with _store_lock:
+            self.id = str(next_user_id)
+            next_user_id += 1
         self.username = username
         self.email = email
         self.password_hash: Optional[str] = None
@@ -66,18 +379,37 @@ class User(UserMixin):
             return False
         return check_password_hash(self.password_hash, password)
 
+    def get_index(self) -> UserIndex:
+        """Consistent snapshot of this user's month buckets, totals and stats
+
+        Read everything for one page from a single snapshot; separate
+        get_* calls may straddle a concurrent write.
+        """
+        return user_indexes.get(self.id, _EMPTY_INDEX)
+
     def get_monthly_expenses(self, year: int, month: int) -> List['Expense']:
         """Get expenses for a specific month and year"""
-        all_expenses = Expense.get_user_expenses(self.id)
-        return [
-            expense for expense in all_expenses
-            if expense.date.year == year and expense.date.month == month
-        ]
+        return self.get_index().month_expenses(year, month)
 
     def get_monthly_total(self, year: int, month: int) -> float:
         """Calculate total expenses for a specific month"""
-        monthly_expenses = self.get_monthly_expenses(year, month)
-        return sum(expense.amount for expense in monthly_expenses)
+        return self.get_index().month_total(year, month)
+
+    def get_monthly_category_totals(self, year: int, month: int) -> Dict[str, float]:
+        """Total spent per category for a specific month"""
+        return self.get_index().month_category_totals(year, month)
+
+    def get_month_version(self, year: int, month: int) -> int:
+        """Version of a month's expenses, for caching what is rendered from them"""
+        return self.get_index().month_version(year, month)
+
+    def get_category_stats(self) -> Dict[str, RunningStats]:
+        """Running statistics of single expense amounts per category"""
+        return self.get_index().category_stats
+
+    def get_monthly_category_stats(self) -> Dict[str, RunningStats]:
+        """Running statistics of monthly totals per category"""
+        return self.get_index().category_month_stats
 
     def get_balance(self) -> float:
         """Calculate current month's balance"""
@@ -114,26 +446,28 @@ class User(UserMixin):
     @staticmethod
     def get_by_email(email: str) -> Optional['User']:
         """Find user by email"""
-        for user in users.values():
+        for user in list(users.values()):
             if user.email == email:
                 return user
         return None
 
     def save(self) -> None:
-        users[self.id] = self
-        # Save to file
-        try:
-            with open(USERS_FILE, 'wb') as f:
-                pickle.dump(users, f)
-
-            with open(COUNTER_FILE, 'wb') as f:
-                pickle.dump({
-                    'next_user_id': next_user_id,
-                    'next_expense_id': next_expense_id
-                }, f)
-            logging.debug(f"User {self.email} saved successfully")
-        except Exception as e:
-            logging.error(f"Error saving user data: {e}")
+        with _store_lock:
+            users[self.id] = self
+            user_cache.invalidate(self.id)
+            # Save to file
+            try:
+                with open(USERS_FILE, 'wb') as f:
+                    pickle.dump(users, f)
+
+                with open(COUNTER_FILE, 'wb') as f:
+                    pickle.dump({
+                        'next_user_id': next_user_id,
+                        'next_expense_id': next_expense_id
+                    }, f)
+                logging.debug(f"User {self.email} saved successfully")
+            except Exception as e:
+                logging.error(f"Error saving user data: {e}")
 
 
 class Expense:
@@ -141,8 +475,9 @@ class Expense:
     def __init__(self, user_id: str, amount: float, category: str,
                  description: str, date: Optional[datetime] = None):
         global next_expense_id
-        self.id = str(next_expense_id)
-        next_expense_id += 1
+        with _store_lock:
+            self.id = str(next_expense_id)
+            next_expense_id += 1
         self.user_id = user_id
         self.amount = float(amount)
         self.category = category
@@ -150,30 +485,75 @@ class Expense:
         self.date = date or datetime.now()
 
     def save(self) -> None:
-        if self.user_id not in expenses:
-            expenses[self.user_id] = []
-        expenses[self.user_id].append(self)
-        # Save to file
-        try:
-            with open(EXPENSES_FILE, 'wb') as f:
-                pickle.dump(expenses, f)
-
-            with open(COUNTER_FILE, 'wb') as f:
-                pickle.dump({
-                    'next_user_id': next_user_id,
-                    'next_expense_id': next_expense_id
-                }, f)
-            logging.debug(f"Expense {self.id} saved successfully")
-        except Exception as e:
-            logging.error(f"Error saving expense data: {e}")
+        with _store_lock:
+            expenses[self.user_id] = expenses.get(self.user_id, []) + [self]
+            _index_user(self.user_id, added=self)
+            # Save to file
+            try:
+                _save_expenses()
+
+                with open(COUNTER_FILE, 'wb') as f:
+                    pickle.dump({
+                        'next_user_id': next_user_id,
+                        'next_expense_id': next_expense_id
+                    }, f)
+                logging.debug(f"Expense {self.id} saved successfully")
+            except Exception as e:
+                logging.error(f"Error saving expense data: {e}")
+
+    def update(self, amount: Optional[float] = None,
+               category: Optional[str] = None,
+               description: Optional[str] = None,
+               date: Optional[datetime] = None) -> Optional['Expense']:
+        """Replace this expense with an edited copy, keeping the month index in sync
+
+        Readers may still hold the stored object, so it is never mutated.
+        Returns the new stored object, or None if the expense was deleted.
+        """
+        changes = {}
+        if amount is not None:
+            changes['amount'] = float(amount)
+        if category is not None:
+            changes['category'] = category
+        if description is not None:
+            changes['description'] = description
+        if date is not None:
+            changes['date'] = date
+
+        with _store_lock:
+            current = Expense.get_by_id(self.user_id, self.id)
+            if current is None:
+                logging.warning(f"Expense {self.id} was deleted before it could be updated")
+                return None
+            edited = copy.copy(current)
+            edited.__dict__.update(changes)
+            expenses[self.user_id] = [edited if e.id == self.id else e
+                                      for e in expenses[self.user_id]]
+            _index_user(self.user_id, added=edited,
+                        removed=(_month_key(current.date), current.id, current.amount,
+                                 current.category))
+            # Only the changed record is written; ids and counters are unchanged
+            try:
+                _journal_expense(edited)
+                logging.debug(f"Expense {self.id} updated successfully")
+            except Exception as e:
+                logging.error(f"Error updating expense data: {e}")
+        return edited
 
     def delete(self) -> None:
         """Delete this expense"""
-        if self.user_id in expenses:
+        with _store_lock:
+            # Another request may have deleted it since this object was looked up
+            current = Expense.get_by_id(self.user_id, self.id)
+            if current is None:
+                logging.warning(f"Expense {self.id} was already deleted")
+                return
             expenses[self.user_id] = [e for e in expenses[self.user_id] if e.id != self.id]
+            _index_user(self.user_id,
+                        removed=(_month_key(current.date), current.id, current.amount,
+                                 current.category))
             try:
-                with open(EXPENSES_FILE, 'wb') as f:
-                    pickle.dump(expenses, f)
+                _save_expenses()
                 logging.debug(f"Expense {self.id} deleted successfully")
             except Exception as e:
                 logging.error(f"Error deleting expense: {e}")
@@ -1,6 +1,6 @@
 from flask import render_template, redirect, url_for, request, flash
 from flask_login import login_user, logout_user, login_required, current_user
-from app import app
+from app import app, fragment_cache
 from models import User, Expense
 from ai_insights import get_ai_insights
 from datetime import datetime
@@ -93,16 +93,18 @@ def dashboard():
     selected_year = int(request.args.get('year', datetime.now().year))
     selected_month = int(request.args.get('month', datetime.now().month))
 
+    # One snapshot, so the version, table, totals and stats all agree even
+    # if the user writes concurrently
+    index = current_user.get_index()
+    month_version = index.month_version(selected_year, selected_month)
+
     # Get expenses for selected month
-    user_expenses = current_user.get_monthly_expenses(selected_year,
-                                                    selected_month)
+    user_expenses = index.month_expenses(selected_year, selected_month)
 
     # Calculate totals
-    total_expenses = sum(expense.amount for expense in user_expenses)
-    expenses_by_category = {}
-    for expense in user_expenses:
-        expenses_by_category[expense.category] = expenses_by_category.get(
-            expense.category, 0) + expense.amount
+    total_expenses = index.month_total(selected_year, selected_month)
+    expenses_by_category = index.month_category_totals(selected_year,
+                                                       selected_month)
 
     # Get month name for display
     month_name = calendar.month_name[selected_month]
@@ -119,21 +121,45 @@ def dashboard():
                              selected_month=selected_month,
                              selected_year=selected_year,
                              monthly_salary=current_user.monthly_salary,
-                             current_savings=current_user.current_savings)
+                             current_savings=current_user.current_savings,
+                             category_stats=index.category_stats,
+                             monthly_category_stats=index.category_month_stats,
+                             current_month_totals=index.month_category_totals(
+                                 datetime.now().year, datetime.now().month))
+
+    # Fragments that only change with the month's expenses are cached
+    years = range(datetime.now().year - 2, datetime.now().year + 1)
+    month_key = (current_user.id, selected_year, selected_month, month_version)
+    month_selector = fragment_cache.render(
+        ('month_selector', selected_year, selected_month, years.start),
+        'fragments/month_selector.html',
+        current_month=selected_month,
+        current_year=selected_year,
+        months=list(enumerate(calendar.month_name))[1:],  # Skip empty first item
+        years=years)
+    expense_table = fragment_cache.render(
+        ('expense_table',) + month_key,
+        'fragments/expense_table.html',
+        expenses=user_expenses,
+        month_name=month_name,
+        current_year=selected_year)
+    category_summary = fragment_cache.render(
+        ('category_summary',) + month_key,
+        'fragments/category_summary.html',
+        total_expenses=total_expenses,
+        expenses_by_category=expenses_by_category)
 
     return render_template(
         'dashboard.html',
-        expenses=user_expenses,
-        total_expenses=total_expenses,
-        expenses_by_category=expenses_by_category,
         monthly_salary=current_user.monthly_salary,
         balance=balance,
         insights=insights,
         current_month=selected_month,
         current_year=selected_year,
         month_name=month_name,
-        months=list(enumerate(calendar.month_name))[1:],  # Skip empty first item
-        years=range(datetime.now().year - 2, datetime.now().year + 1))
+        month_selector=month_selector,
+        expense_table=expense_table,
+        category_summary=category_summary)
 
 
 @app.route('/add_expense', methods=['POST'])
@@ -170,14 +196,18 @@ def generate_insights():
     selected_year = int(request.form.get('year', datetime.now().year))
     selected_month = int(request.form.get('month', datetime.now().month))
 
-    user_expenses = current_user.get_monthly_expenses(selected_year,
-                                                    selected_month)
+    index = current_user.get_index()
+    user_expenses = index.month_expenses(selected_year, selected_month)
     insights = get_ai_insights(user_expenses,
                              generate=True,
                              selected_month=selected_month,
                              selected_year=selected_year,
                              monthly_salary=current_user.monthly_salary,
-                             current_savings=current_user.current_savings)
+                             current_savings=current_user.current_savings,
+                             category_stats=index.category_stats,
+                             monthly_category_stats=index.category_month_stats,
+                             current_month_totals=index.month_category_totals(
+                                 datetime.now().year, datetime.now().month))
     logging.info(f"Generated insights for user {current_user.email}")
     flash('AI insights generated')
 
@@ -242,14 +272,14 @@ def edit_expense(expense_id):
         except ValueError:
             return 'Invalid amount or date format', 400
 
-        # Update expense details
-        expense.date = date
-        expense.category = data['category']
-        expense.description = data['description']
-        expense.amount = amount
-
-        # Save changes
-        expense.save()
+        # Update expense details in place
+        updated = expense.update(amount=amount,
+                                 category=data['category'],
+                                 description=data['description'],
+                                 date=date)
+        if updated is None:
+            logging.warning(f"Expense {expense_id} was deleted while being edited")
+            return 'Expense not found', 404
         logging.info(f"Expense {expense_id} updated by user {current_user.email}")
         return 'Expense updated successfully', 200
 
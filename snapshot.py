@@ -0,0 +1,262 @@
+"""
+Compact binary snapshot of the expenses store
+
+Layout (little-endian, every section 8-byte aligned):
+
+    header      magic, version, record/user/category counts, reserved,
+                next expense id (32 bytes)
+    offsets     one u64 offset per section below
+    users       per user: user id (string ref), first row, row count
+    categories  per category: string ref; rows store the u16 code
+    columns     id u64 | date i64 | amount f64 | category u16 |
+                description offset u32 | description length u32
+    strings     UTF-8 string table
+
+Rows are sorted by user and then by date, so one user's month is a
+contiguous slice found by bisecting the date column. Readers map the file
+with ``mmap`` and only decode the rows they ask for.
+
+This is an export format: the app still loads from and writes to the
+pickle files, so a snapshot is a point-in-time copy that goes stale on the
+next write. It is read by batch jobs such as batch_report.py.
+"""
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+SNAPSHOT_FILE = "expenses_data.snap"
+
+MAGIC = b"SETS"
+VERSION = 1
+
+# Header and offset table are multiples of 8 so every section stays aligned
+HEADER = struct.Struct("<4sHHIIIIQ")
+SECTIONS = ("users", "categories", "ids", "dates", "amounts",
+            "category_codes", "desc_offsets", "desc_lengths", "strings")
+OFFSETS = struct.Struct("<" + "Q" * len(SECTIONS))
+USER_ENTRY = struct.Struct("<IIII")
+STRING_REF = struct.Struct("<II")
+
+# Dates are stored as microseconds since 0001-01-01 (naive, like the app)
+_EPOCH = datetime(1, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, truncated or unsupported"""
+
+
+class SnapshotRecord(NamedTuple):
+    id: str
+    user_id: str
+    date: datetime
+    amount: float
+    category: str
+    description: str
+
+
+def _encode_date(date: datetime) -> int:
+    return (date - _EPOCH) // _MICROSECOND
+
+
+def _decode_date(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def _pad(buf: bytearray) -> None:
+    buf.extend(b"\0" * (-len(buf) % 8))
+
+
+def write_snapshot(path: str, expenses: Dict[str, Iterable], next_expense_id: int = 1) -> int:
+    """Write all expenses to ``path`` atomically and return the row count"""
+    strings = bytearray()
+    string_refs: Dict[str, Tuple[int, int]] = {}
+
+    def ref(value: str) -> Tuple[int, int]:
+        if value not in string_refs:
+            encoded = value.encode("utf-8")
+            string_refs[value] = (len(strings), len(encoded))
+            strings.extend(encoded)
+        return string_refs[value]
+
+    users: List[Tuple[str, int, int]] = []
+    categories: Dict[str, int] = {}
+    rows = []
+    for user_id in sorted(expenses):
+        user_rows = sorted(expenses[user_id], key=lambda e: e.date)
+        users.append((user_id, len(rows), len(user_rows)))
+        for expense in user_rows:
+            category = expense.category or ""
+            code = categories.setdefault(category, len(categories))
+            rows.append((int(expense.id), _encode_date(expense.date),
+                         float(expense.amount), code, ref(expense.description or "")))
+
+    if len(categories) > 0xFFFF:
+        raise SnapshotError("Too many categories for a u16 category code")
+
+    body = bytearray()
+    offsets = {}
+    base = HEADER.size + OFFSETS.size
+
+    def section(name: str, data: bytes) -> None:
+        offsets[name] = base + len(body)
+        body.extend(data)
+        _pad(body)
+
+    section("users", b"".join(USER_ENTRY.pack(*ref(user_id), start, count)
+                             for user_id, start, count in users))
+    section("categories", b"".join(STRING_REF.pack(*ref(name)) for name in categories))
+    count = len(rows)
+    section("ids", struct.pack(f"<{count}Q", *(r[0] for r in rows)))
+    section("dates", struct.pack(f"<{count}q", *(r[1] for r in rows)))
+    section("amounts", struct.pack(f"<{count}d", *(r[2] for r in rows)))
+    section("category_codes", struct.pack(f"<{count}H", *(r[3] for r in rows)))
+    section("desc_offsets", struct.pack(f"<{count}I", *(r[4][0] for r in rows)))
+    section("desc_lengths", struct.pack(f"<{count}I", *(r[4][1] for r in rows)))
+    section("strings", bytes(strings))
+
+    header = HEADER.pack(MAGIC, VERSION, 0, count, len(users), len(categories), 0,
+                         next_expense_id)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(OFFSETS.pack(*(offsets[name] for name in SECTIONS)))
+        f.write(body)
+    os.replace(tmp_path, path)
+    return count
+
+
+class SnapshotReader:
+    """Memory-mapped, read-only view over a snapshot file"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise SnapshotError(f"{path} is empty")
+        try:
+            self._open_sections(path)
+        except Exception:
+            self.close()
+            raise
+
+    def _open_sections(self, path: str) -> None:
+        if len(self._map) < HEADER.size + OFFSETS.size:
+            raise SnapshotError(f"{path} is truncated")
+        (magic, version, _, self.record_count, user_count, category_count, _,
+         self.next_expense_id) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path} is not an expense snapshot")
+        if version != VERSION:
+            raise SnapshotError(f"Unsupported snapshot version {version}")
+
+        offsets = dict(zip(SECTIONS, OFFSETS.unpack_from(self._map, HEADER.size)))
+        view = self._view = memoryview(self._map)
+        n = self.record_count
+
+        def check(name: str, size: int) -> int:
+            start = offsets[name]
+            if start + size > len(view):
+                raise SnapshotError(f"{path} is truncated")
+            return start
+
+        self._path = path
+        self._strings = view[check("strings", 0):]
+        check("users", user_count * USER_ENTRY.size)
+        check("categories", category_count * STRING_REF.size)
+
+        def column(name: str, fmt: str, size: int) -> memoryview:
+            start = check(name, n * size)
+            return view[start:start + n * size].cast(fmt)
+
+        self._ids = column("ids", "Q", 8)
+        self._dates = column("dates", "q", 8)
+        self._amounts = column("amounts", "d", 8)
+        self._category_codes = column("category_codes", "H", 2)
+        self._desc_offsets = column("desc_offsets", "I", 4)
+        self._desc_lengths = column("desc_lengths", "I", 4)
+
+        self.categories = [
+            self._string(*STRING_REF.unpack_from(self._map, offsets["categories"] + i * STRING_REF.size))
+            for i in range(category_count)
+        ]
+        self._users: Dict[str, Tuple[int, int]] = {}
+        for i in range(user_count):
+            str_off, str_len, start, count = USER_ENTRY.unpack_from(
+                self._map, offsets["users"] + i * USER_ENTRY.size)
+            if start + count > n:
+                raise SnapshotError(f"{path} has rows outside the record table")
+            self._users[self._string(str_off, str_len)] = (start, count)
+
+    def _string(self, offset: int, length: int) -> str:
+        if offset + length > len(self._strings):
+            raise SnapshotError(f"{self._path} is truncated")
+        try:
+            return bytes(self._strings[offset:offset + length]).decode("utf-8")
+        except UnicodeDecodeError:
+            raise SnapshotError(f"{self._path} has a corrupt string table")
+
+    def _category(self, code: int) -> str:
+        if code >= len(self.categories):
+            raise SnapshotError(f"{self._path} has an unknown category code {code}")
+        return self.categories[code]
+
+    def _record(self, user_id: str, row: int) -> SnapshotRecord:
+        return SnapshotRecord(
+            id=str(self._ids[row]),
+            user_id=user_id,
+            date=_decode_date(self._dates[row]),
+            amount=self._amounts[row],
+            category=self._category(self._category_codes[row]),
+            description=self._string(self._desc_offsets[row], self._desc_lengths[row]),
+        )
+
+    def user_ids(self) -> List[str]:
+        return list(self._users)
+
+    def scan(self, user_id: str) -> Iterator[Tuple[datetime, float, str]]:
+        """Yield (date, amount, category) for a user without decoding descriptions"""
+        start, count = self._users.get(user_id, (0, 0))
+        for row in range(start, start + count):
+            yield (_decode_date(self._dates[row]), self._amounts[row],
+                   self._category(self._category_codes[row]))
+
+    def month_rows(self, user_id: str, year: int, month: int) -> range:
+        """Row range holding one user's expenses for a month"""
+        start, count = self._users.get(user_id, (0, 0))
+        first = _encode_date(datetime(year, month, 1))
+        next_month = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+        lo = bisect_left(self._dates, first, start, start + count)
+        hi = bisect_left(self._dates, _encode_date(next_month), lo, start + count)
+        return range(lo, hi)
+
+    def month_total(self, user_id: str, year: int, month: int) -> float:
+        rows = self.month_rows(user_id, year, month)
+        return sum(self._amounts[rows.start:rows.stop])
+
+    def get_monthly_expenses(self, user_id: str, year: int, month: int) -> List[SnapshotRecord]:
+        return [self._record(user_id, row) for row in self.month_rows(user_id, year, month)]
+
+    def get_user_expenses(self, user_id: str) -> List[SnapshotRecord]:
+        start, count = self._users.get(user_id, (0, 0))
+        return [self._record(user_id, row) for row in range(start, start + count)]
+
+    def close(self) -> None:
+        for name in ("_ids", "_dates", "_amounts", "_category_codes",
+                     "_desc_offsets", "_desc_lengths", "_strings", "_view"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "SnapshotReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Empty in-memory store persisting to a temporary directory"""
+    for name in ('USERS_FILE', 'EXPENSES_FILE', 'COUNTER_FILE', 'EXPENSE_JOURNAL_FILE'):
+        monkeypatch.setattr(models, name, str(tmp_path / getattr(models, name)))
+    models.users.clear()
+    models.expenses.clear()
+    models.rebuild_index()
+    models.user_cache.invalidate()
+    yield models
+    models.users.clear()
+    models.expenses.clear()
+    models.rebuild_index()
+    models.user_cache.invalidate()
+
+
+def assert_index_consistent(user_id):
+    """The incrementally maintained index must match a full rebuild"""
+    before = models.user_indexes.get(user_id, models.UserIndex())
+    models.rebuild_index()
+    after = models.user_indexes.get(user_id, models.UserIndex())
+
+    assert ({key: sorted(e.id for e in bucket) for key, bucket in before.months.items()} ==
+            {key: sorted(e.id for e in bucket) for key, bucket in after.months.items()})
+    assert before.totals.keys() == after.totals.keys()
+    for key, total in after.totals.items():
+        assert before.totals[key] == pytest.approx(total)
+    for expected, actual in ((before.category_stats, after.category_stats),
+                             (before.category_month_stats, after.category_month_stats)):
+        assert expected.keys() == actual.keys()
+        for category, running in actual.items():
+            assert expected[category].count == running.count
+            assert expected[category].mean == pytest.approx(running.mean)
+            assert expected[category].m2 == pytest.approx(running.m2, abs=1e-6)
+
+
+@pytest.fixture
+def client(store):
+    """Test client logged in as a freshly registered user"""
+    from app import app
+
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        client.post('/register', data={
+            'username': 'demo', 'email': 'demo@example.com',
+            'password': 'secret1', 'confirm_password': 'secret1',
+        })
+        client.user = store.User.get_by_email('demo@example.com')
+        yield client
@@ -0,0 +1,59 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from ai_insights import get_anomaly_insights
+from models import RunningStats
+
+
+def _stats(*values):
+    stats = RunningStats()
+    for value in values:
+        stats = stats.push(value)
+    return stats
+
+
+def _expense(amount):
+    return SimpleNamespace(amount=amount, category='Food', description='x',
+                           date=datetime(2025, 3, 1))
+
+
+# Four complete months near $500, plus the month under test at $50
+MONTHLY = {'Food': _stats(480, 510, 495, 520, 50)}
+
+
+def test_low_total_is_flagged_for_completed_month():
+    insights = get_anomaly_insights([_expense(50)], {'Food': 50}, 'March',
+                                    monthly_category_stats=MONTHLY, month_complete=True)
+    assert any('much lower' in insight for insight in insights)
+
+
+def test_low_total_is_not_flagged_while_month_in_progress():
+    insights = get_anomaly_insights([_expense(50)], {'Food': 50}, 'March',
+                                    monthly_category_stats=MONTHLY, month_complete=False)
+    assert insights == []
+
+
+def test_high_total_is_flagged_while_month_in_progress():
+    monthly = {'Food': _stats(480, 510, 495, 520, 2000)}
+    insights = get_anomaly_insights([_expense(2000)], {'Food': 2000}, 'March',
+                                    monthly_category_stats=monthly, month_complete=False)
+    assert any('much higher' in insight for insight in insights)
+
+
+def test_unusual_single_expense_is_flagged():
+    category = {'Food': _stats(10, 12, 11, 9, 10, 13, 250)}
+    insights = get_anomaly_insights([_expense(250)], {'Food': 250}, 'March',
+                                    category_stats=category)
+    assert any('Unusual Food expense' in insight for insight in insights)
+
+
+def test_in_progress_month_is_kept_out_of_history():
+    # Four complete months near $500, a $40 partial current month and the
+    # scored past month at $700
+    monthly = {'Food': _stats(480, 510, 495, 520, 40, 700)}
+    kwargs = dict(monthly_category_stats=monthly, month_complete=True)
+
+    assert get_anomaly_insights([_expense(700)], {'Food': 700}, 'February', **kwargs) == []
+    insights = get_anomaly_insights([_expense(700)], {'Food': 700}, 'February',
+                                    in_progress_totals={'Food': 40}, **kwargs)
+    assert any('much higher' in insight for insight in insights)
@@ -0,0 +1,51 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from batch_report import build_report, merge_partials, run_report
+from snapshot import write_snapshot
+
+
+def test_growth_is_against_the_previous_calendar_month():
+    merged = merge_partials([
+        {'categories': {'Food': [2, 30.0]},
+         'months': {'2025-01': [1, 10.0, 1]}, 'active_users': 1},
+        {'categories': {'Food': [1, 20.0]},
+         'months': {'2025-01': [1, 10.0, 1], '2025-03': [1, 20.0, 1]}, 'active_users': 1},
+    ])
+    report = build_report(merged, registered_users=5)
+
+    assert [(row['month'], row['total'], row['active_users']) for row in report['monthly']] == [
+        ('2025-01', 20.0, 2), ('2025-02', 0.0, 0), ('2025-03', 20.0, 1)]
+    assert [row['spend_growth_pct'] for row in report['monthly']] == [None, -100.0, None]
+    assert report['summary'] == {'active_users': 2, 'registered_users': 5}
+    assert report['categories'] == [{'category': 'Food', 'expenses': 3, 'total': 50.0}]
+
+
+def test_growth_across_a_year_boundary():
+    merged = merge_partials([{'categories': {}, 'active_users': 1,
+                              'months': {'2024-12': [1, 10.0, 1], '2025-01': [1, 15.0, 1]}}])
+    monthly = build_report(merged)['monthly']
+    assert [row['month'] for row in monthly] == ['2024-12', '2025-01']
+    assert monthly[1]['spend_growth_pct'] == 50.0
+
+
+def test_run_report_on_a_snapshot_with_two_workers(tmp_path):
+    def expense(expense_id, date, amount, category):
+        return SimpleNamespace(id=str(expense_id), date=date, amount=amount,
+                               category=category, description='')
+
+    path = str(tmp_path / 'expenses.snap')
+    write_snapshot(path, {
+        'a': [expense(1, datetime(2025, 1, 5), 10.0, 'Food'),
+              expense(2, datetime(2025, 2, 5), 30.0, 'Rent')],
+        'b': [expense(3, datetime(2025, 2, 9), 5.0, 'Food')],
+        'c': [],
+    }, next_expense_id=4)
+
+    report = run_report(path, workers=2)
+
+    assert report['summary'] == {'active_users': 2}
+    assert report['categories'] == [{'category': 'Rent', 'expenses': 1, 'total': 30.0},
+                                    {'category': 'Food', 'expenses': 2, 'total': 15.0}]
+    assert [(row['month'], row['total'], row['active_users']) for row in report['monthly']] == [
+        ('2025-01', 10.0, 1), ('2025-02', 35.0, 2)]
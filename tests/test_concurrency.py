@@ -0,0 +1,72 @@
+import random
+import threading
+from datetime import datetime
+
+from ai_insights import get_ai_insights
+from conftest import assert_index_consistent
+
+THREADS = 16
+OPERATIONS = 200
+CATEGORIES = ['Food', 'Bills', 'Shopping']
+
+
+def test_concurrent_add_edit_delete_and_dashboard(store):
+    users = [store.User(f'user{i}', f'user{i}@example.com') for i in range(4)]
+    for user in users:
+        user.save()
+    errors = []
+
+    def worker(seed):
+        rng = random.Random(seed)
+        try:
+            for _ in range(OPERATIONS):
+                user = rng.choice(users)
+                op = rng.random()
+                if op < 0.35:
+                    store.Expense(user.id, rng.uniform(1, 100), rng.choice(CATEGORIES), 'x',
+                                  datetime(2025, rng.randint(1, 3), rng.randint(1, 28))).save()
+                elif op < 0.55:
+                    user_expenses = store.Expense.get_user_expenses(user.id)
+                    if user_expenses:
+                        rng.choice(user_expenses).update(
+                            amount=rng.uniform(1, 100), category=rng.choice(CATEGORIES),
+                            date=datetime(2025, rng.randint(1, 3), 15))
+                elif op < 0.7:
+                    user_expenses = store.Expense.get_user_expenses(user.id)
+                    if user_expenses:
+                        rng.choice(user_expenses).delete()
+                else:
+                    # What the dashboard reads for a month
+                    month = rng.randint(1, 3)
+                    month_expenses = user.get_monthly_expenses(2025, month)
+                    assert len({e.id for e in month_expenses}) == len(month_expenses)
+                    assert all(e.date.month == month for e in month_expenses)
+                    user.get_monthly_total(2025, month)
+                    user.get_monthly_category_totals(2025, month)
+                    get_ai_insights(month_expenses, generate=True, selected_month=month,
+                                    selected_year=2025, monthly_salary=5000,
+                                    category_stats=user.get_category_stats(),
+                                    monthly_category_stats=user.get_monthly_category_stats())
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    in_memory = {user.id: sorted((e.id, e.amount, e.category, e.date)
+                                 for e in store.expenses.get(user.id, []))
+                 for user in users}
+    for user in users:
+        ids = [e.id for e in store.expenses.get(user.id, [])]
+        assert len(ids) == len(set(ids))
+        assert_index_consistent(user.id)
+
+    # What was persisted matches what is in memory
+    store.load_data()
+    for user in users:
+        assert in_memory[user.id] == sorted((e.id, e.amount, e.category, e.date)
+                                            for e in store.expenses.get(user.id, []))
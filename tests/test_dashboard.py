@@ -0,0 +1,81 @@
+import os
+from datetime import datetime
+
+from flask import url_for
+
+import app as app_module
+import models
+from app import app, fragment_cache
+
+
+def _dashboard(client, year, month):
+    response = client.get(f'/dashboard?year={year}&month={month}')
+    assert response.status_code == 200
+    return response.get_data(as_text=True)
+
+
+def test_repeat_view_of_a_month_is_served_from_the_fragment_cache(client):
+    models.Expense(client.user.id, 10, 'Food', 'Lunch', datetime(2025, 1, 5)).save()
+    fragment_cache.clear()
+
+    first = _dashboard(client, 2025, 1)
+    after_first = fragment_cache.stats()
+    second = _dashboard(client, 2025, 1)
+    after_second = fragment_cache.stats()
+
+    assert after_second['misses'] == after_first['misses']
+    assert after_second['hits'] - after_first['hits'] == 3
+    assert 'Lunch' in first and 'Lunch' in second
+
+
+def test_fragments_rerender_after_save_update_and_delete(client):
+    expense = models.Expense(client.user.id, 10, 'Food', 'Lunch', datetime(2025, 1, 5))
+    expense.save()
+    page = _dashboard(client, 2025, 1)
+    assert 'Food: $10.00' in page and 'Total Expenses: $10.00' in page
+
+    expense = expense.update(amount=20, category='Bills')
+    page = _dashboard(client, 2025, 1)
+    assert 'Bills: $20.00' in page and 'Total Expenses: $20.00' in page
+    assert 'Food: $10.00' not in page
+
+    # Moving it to another month changes both months' fragments
+    expense = expense.update(amount=25, category='Shopping', date=datetime(2025, 2, 7))
+    page = _dashboard(client, 2025, 1)
+    assert 'No expenses recorded for this month' in page
+    assert f'id="expense-{expense.id}"' not in page
+    page = _dashboard(client, 2025, 2)
+    assert 'Shopping: $25.00' in page and f'id="expense-{expense.id}"' in page
+
+    added = models.Expense(client.user.id, 5, 'Food', 'Coffee', datetime(2025, 2, 9))
+    added.save()
+    page = _dashboard(client, 2025, 2)
+    assert 'Food: $5.00' in page and 'Total Expenses: $30.00' in page
+
+    expense.delete()
+    page = _dashboard(client, 2025, 2)
+    assert 'Shopping: $25.00' not in page and 'Total Expenses: $5.00' in page
+    assert f'id="expense-{expense.id}"' not in page
+
+
+def test_static_urls_carry_a_content_hash(client, tmp_path, monkeypatch):
+    page = _dashboard(client, 2025, 1)
+    assert '/static/css/style.css?v=' in page
+
+    (tmp_path / 'css').mkdir()
+    stylesheet = tmp_path / 'css' / 'style.css'
+    stylesheet.write_text('body { color: red; }')
+    monkeypatch.setattr(app, 'static_folder', str(tmp_path))
+    monkeypatch.setattr(app_module, '_static_hashes', {})
+
+    with app.test_request_context():
+        before = url_for('static', filename='css/style.css')
+        assert url_for('static', filename='css/style.css') == before
+
+        stylesheet.write_text('body { color: blue; }')
+        mtime = os.path.getmtime(stylesheet) + 1
+        os.utime(stylesheet, (mtime, mtime))
+        after = url_for('static', filename='css/style.css')
+
+    assert '?v=' in before and '?v=' in after
+    assert before != after
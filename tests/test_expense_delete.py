@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from conftest import assert_index_consistent
+
+
+def test_deleting_twice_retracts_once(store):
+    user = store.User('demo', 'demo@example.com')
+    user.save()
+    lunch = store.Expense(user.id, 10, 'Food', 'Lunch', datetime(2025, 1, 5))
+    lunch.save()
+    store.Expense(user.id, 5, 'Food', 'Coffee', datetime(2025, 1, 6)).save()
+
+    # Both requests looked the expense up before either deleted it
+    first = store.Expense.get_by_id(user.id, lunch.id)
+    second = store.Expense.get_by_id(user.id, lunch.id)
+    first.delete()
+    second.delete()
+
+    assert len(store.expenses[user.id]) == 1
+    assert user.get_monthly_total(2025, 1) == 5
+    assert user.get_category_stats()['Food'].count == 1
+    assert_index_consistent(user.id)
@@ -0,0 +1,120 @@
+import os
+from datetime import datetime
+
+from conftest import assert_index_consistent
+
+
+def _user(store):
+    user = store.User('demo', 'demo@example.com')
+    user.save()
+    return user
+
+
+def test_repeated_edits_keep_list_size_and_totals(store):
+    user = _user(store)
+    expense = store.Expense(user.id, 10, 'Food', 'Lunch', datetime(2025, 1, 5))
+    expense.save()
+    store.Expense(user.id, 5, 'Food', 'Coffee', datetime(2025, 1, 6)).save()
+    phone = store.Expense(user.id, 40, 'Bills', 'Phone', datetime(2025, 2, 1))
+    phone.save()
+
+    for i in range(10):
+        month = 2 if i % 2 else 1
+        store.Expense.get_by_id(user.id, expense.id).update(
+            amount=20 + i, date=datetime(2025, month, 10))
+
+    # Last edit (i=9) moved the expense to February with amount 29
+    assert len(store.expenses[user.id]) == 3
+    assert user.get_monthly_total(2025, 1) == 5
+    assert user.get_monthly_total(2025, 2) == 69
+    assert sorted(e.id for e in user.get_monthly_expenses(2025, 2)) == sorted([expense.id, phone.id])
+    assert [e.description for e in user.get_monthly_expenses(2025, 1)] == ['Coffee']
+    assert_index_consistent(user.id)
+
+
+def test_edit_moving_last_expense_drops_empty_month(store):
+    user = _user(store)
+    expense = store.Expense(user.id, 10, 'Food', 'Lunch', datetime(2025, 1, 5))
+    expense.save()
+
+    store.Expense.get_by_id(user.id, expense.id).update(date=datetime(2025, 3, 1), category='Bills')
+
+    assert (2025, 1) not in user.get_index().months
+    assert user.get_monthly_total(2025, 1) == 0
+    assert user.get_monthly_total(2025, 3) == 10
+    assert user.get_monthly_category_totals(2025, 3) == {'Bills': 10}
+    assert_index_consistent(user.id)
+
+
+def test_edits_are_journaled_and_replayed_on_load(store):
+    user = _user(store)
+    expense = store.Expense(user.id, 10, 'Food', 'Lunch', datetime(2025, 1, 5))
+    expense.save()
+    with open(store.EXPENSES_FILE, 'rb') as f:
+        saved = f.read()
+
+    for amount in (11, 12, 13):
+        store.Expense.get_by_id(user.id, expense.id).update(amount=amount)
+
+    # Edits append to the journal and leave the full expenses file alone
+    with open(store.EXPENSES_FILE, 'rb') as f:
+        assert f.read() == saved
+    assert os.path.exists(store.EXPENSE_JOURNAL_FILE)
+
+    store.load_data()
+    assert len(store.expenses[user.id]) == 1
+    assert store.expenses[user.id][0].amount == 13
+    assert user.get_monthly_total(2025, 1) == 13
+
+
+def test_full_save_compacts_journal(store):
+    user = _user(store)
+    expense = store.Expense(user.id, 10, 'Food', 'Lunch', datetime(2025, 1, 5))
+    expense.save()
+    store.Expense.get_by_id(user.id, expense.id).update(amount=15)
+
+    store.Expense(user.id, 1, 'Food', 'Gum', datetime(2025, 1, 6)).save()
+
+    assert not os.path.exists(store.EXPENSE_JOURNAL_FILE)
+    store.load_data()
+    assert sorted(e.amount for e in store.expenses[user.id]) == [1, 15]
+
+
+def test_update_publishes_a_new_object(store):
+    user = _user(store)
+    expense = store.Expense(user.id, 10, 'Food', 'Lunch', datetime(2025, 1, 5))
+    expense.save()
+    january = user.get_monthly_expenses(2025, 1)
+
+    edited = expense.update(amount=30, category='Bills', date=datetime(2025, 2, 1))
+
+    # A reader still holding January's bucket sees the row as it was
+    assert (january[0].amount, january[0].category, january[0].date.month) == (10, 'Food', 1)
+    assert store.Expense.get_by_id(user.id, expense.id) is edited
+    assert user.get_monthly_expenses(2025, 2) == [edited]
+    assert_index_consistent(user.id)
+
+
+def test_update_after_delete_is_ignored(store):
+    user = _user(store)
+    expense = store.Expense(user.id, 10, 'Food', 'Lunch', datetime(2025, 1, 5))
+    expense.save()
+    expense.delete()
+
+    assert expense.update(amount=99) is None
+    assert store.expenses[user.id] == []
+    assert user.get_monthly_total(2025, 1) == 0
+
+
+def test_index_snapshot_is_unaffected_by_later_writes(store):
+    user = _user(store)
+    store.Expense(user.id, 10, 'Food', 'Lunch', datetime(2025, 1, 5)).save()
+    index = user.get_index()
+
+    store.Expense(user.id, 5, 'Bills', 'Phone', datetime(2025, 1, 6)).save()
+
+    # Everything read from one snapshot agrees with itself
+    assert [e.amount for e in index.month_expenses(2025, 1)] == [10]
+    assert index.month_total(2025, 1) == 10
+    assert index.month_category_totals(2025, 1) == {'Food': 10}
+    assert user.get_monthly_total(2025, 1) == 15
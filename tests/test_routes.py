@@ -0,0 +1,37 @@
+from datetime import datetime
+
+import models
+
+
+def _edit(client, expense_id, **fields):
+    data = {'amount': '20', 'category': 'Bills', 'description': 'Rent', 'date': '2025-01-03'}
+    data.update(fields)
+    return client.post(f'/edit_expense/{expense_id}', json=data)
+
+
+def test_edit_expense_updates_in_place(client):
+    expense = models.Expense(client.user.id, 10, 'Food', 'Lunch', datetime(2025, 1, 5))
+    expense.save()
+
+    response = _edit(client, expense.id)
+
+    assert response.status_code == 200
+    assert len(models.expenses[client.user.id]) == 1
+    assert client.user.get_monthly_category_totals(2025, 1) == {'Bills': 20}
+
+
+def test_edit_expense_deleted_meanwhile_is_not_found(client, monkeypatch):
+    expense = models.Expense(client.user.id, 10, 'Food', 'Lunch', datetime(2025, 1, 5))
+    expense.save()
+    update = models.Expense.update
+
+    def delete_then_update(self, **changes):
+        # Another request deletes the expense after this one looked it up
+        models.Expense.get_by_id(self.user_id, self.id).delete()
+        return update(self, **changes)
+
+    monkeypatch.setattr(models.Expense, 'update', delete_then_update)
+    response = _edit(client, expense.id)
+
+    assert response.status_code == 404
+    assert models.expenses[client.user.id] == []
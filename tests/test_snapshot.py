@@ -0,0 +1,64 @@
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from snapshot import HEADER, OFFSETS, SECTIONS, SnapshotError, SnapshotReader, write_snapshot
+
+
+def _expense(id, user_id, date, amount, category, description):
+    return SimpleNamespace(id=id, user_id=user_id, date=date, amount=amount,
+                           category=category, description=description)
+
+
+@pytest.fixture
+def snapshot_file(tmp_path):
+    path = str(tmp_path / 'expenses.snap')
+    write_snapshot(path, {
+        '1': [_expense('2', '1', datetime(2025, 2, 3), 12.5, 'Food', 'Lunch'),
+              _expense('1', '1', datetime(2025, 1, 9), 40.0, 'Bills', 'Phone bill'),
+              _expense('3', '1', datetime(2025, 2, 20), 7.25, 'Food', 'Café')],
+        '2': [_expense('4', '2', datetime(2025, 2, 1), 99.0, 'Shopping', 'Shoes')],
+    }, next_expense_id=5)
+    return path
+
+
+def test_month_slice_round_trips(snapshot_file):
+    with SnapshotReader(snapshot_file) as reader:
+        assert reader.next_expense_id == 5
+        february = reader.get_monthly_expenses('1', 2025, 2)
+        assert [(e.id, e.amount, e.category, e.description) for e in february] == [
+            ('2', 12.5, 'Food', 'Lunch'), ('3', 7.25, 'Food', 'Café')]
+        assert reader.month_total('1', 2025, 1) == 40.0
+        assert reader.get_monthly_expenses('2', 2025, 1) == []
+        assert len(reader.get_user_expenses('2')) == 1
+
+
+def _read_all(path):
+    with SnapshotReader(path) as reader:
+        return {user_id: reader.get_user_expenses(user_id) for user_id in reader.user_ids()}
+
+
+def test_truncated_file_raises_snapshot_error(snapshot_file):
+    expected = _read_all(snapshot_file)
+    with open(snapshot_file, 'rb') as f:
+        data = f.read()
+    for size in range(len(data)):
+        with open(snapshot_file, 'wb') as f:
+            f.write(data[:size])
+        try:
+            records = _read_all(snapshot_file)
+        except SnapshotError:
+            continue
+        # Only trailing padding can be cut without losing data
+        assert records == expected, f"truncated to {size} bytes decoded silently"
+
+
+def test_sections_are_8_byte_aligned(snapshot_file):
+    with open(snapshot_file, 'rb') as f:
+        data = f.read()
+    offsets = OFFSETS.unpack_from(data, HEADER.size)
+    assert (HEADER.size + OFFSETS.size) % 8 == 0
+    for name, offset in zip(SECTIONS, offsets):
+        assert offset % 8 == 0, name
@@ -0,0 +1,47 @@
+def _saved_user(store):
+    user = store.User('demo', 'demo@example.com')
+    user.save()
+    return user
+
+
+def test_hits_after_first_load(store):
+    cache = store.UserCache(ttl=60)
+    user = _saved_user(store)
+
+    assert cache.get(user.id) is user
+    assert cache.get(user.id) is user
+    assert cache.get('missing') is None
+    assert cache.stats() == {'hits': 1, 'misses': 2, 'size': 1}
+
+
+def test_expired_entries_are_evicted(store, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(store.time, 'monotonic', lambda: clock[0])
+    cache = store.UserCache(ttl=10)
+    first, second = _saved_user(store), _saved_user(store)
+    cache.get(first.id)
+    cache.get(second.id)
+
+    clock[0] += 11
+    store.users.pop(first.id)
+    assert cache.get(first.id) is None
+    # The miss path also sweeps other expired entries
+    cache.get(second.id)
+    assert cache.stats()['size'] == 1
+
+
+def test_invalidation_during_load_is_not_overwritten(store, monkeypatch):
+    cache = store.UserCache(ttl=60)
+    user = _saved_user(store)
+    load = store.User.get
+
+    def load_then_save(user_id):
+        loaded = load(user_id)
+        # A save lands after the backend read but before the cache stores it
+        cache.invalidate(user_id)
+        return loaded
+
+    monkeypatch.setattr(store.User, 'get', staticmethod(load_then_save))
+    cache.get(user.id)
+
+    assert cache.stats()['size'] == 0